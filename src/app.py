@@ -8,7 +8,17 @@ for extracurricular activities at Mergington High School.
 from fastapi import FastAPI, HTTPException, Form
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+import heapq
 import os
+import re
+import threading
+import time
+import uuid
 from pathlib import Path
 
 app = FastAPI(title="Mergington High School API",
@@ -19,6 +29,49 @@ current_dir = Path(__file__).parent
 app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
           "static")), name="static")
 
+# Email domains students may sign up with, comma separated
+ALLOWED_EMAIL_DOMAINS = frozenset(
+    domain.strip().lower()
+    for domain in os.environ.get("ALLOWED_EMAIL_DOMAINS", "mergington.edu").split(",")
+    if domain.strip()
+)
+
+# Precompiled pattern for a plain ASCII "local@domain" address
+EMAIL_PATTERN = re.compile(
+    r"^(?P<local>[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*)"
+    r"@(?P<domain>(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63})$",
+    re.IGNORECASE | re.ASCII,
+)
+
+
+@lru_cache(maxsize=4096)
+def canonicalize_email(email: str) -> Optional[str]:
+    """Return the canonical form of an email address, or None if it is invalid.
+
+    Surrounding whitespace is trimmed and the address is lowercased, since
+    school mailboxes are case-insensitive. Results are memoized so repeat
+    submissions skip the regex work.
+    """
+    email = email.strip()
+    if len(email) > 254:
+        return None
+    match = EMAIL_PATTERN.match(email)
+    if match is None or len(match.group("local")) > 64:
+        return None
+    domain = match.group("domain").lower()
+    if ALLOWED_EMAIL_DOMAINS and domain not in ALLOWED_EMAIL_DOMAINS:
+        return None
+    return f"{match.group('local').lower()}@{domain}"
+
+
+def normalize_email(email: str) -> str:
+    """Canonicalize an email address or reject the request"""
+    canonical = canonicalize_email(email)
+    if canonical is None:
+        raise HTTPException(status_code=400, detail="Invalid email address")
+    return canonical
+
+
 # In-memory activity database
 activities = {
     "Chess Club": {
@@ -80,6 +133,136 @@ activities = {
     }
 }
 
+# Guards the rosters, the event log and everything derived from them
+roster_lock = threading.Lock()
+
+# Append-only audit log of roster changes: (timestamp, activity, action, email).
+# An event's position in the list is its sequence number.
+events = []
+
+# Timestamp of each event, kept parallel to `events` for bisect lookups
+event_timestamps = []
+
+# Wall-clock reading paired with a monotonic one, so event times never run backwards
+CLOCK_ORIGIN = time.time()
+MONOTONIC_ORIGIN = time.monotonic()
+
+
+def event_clock() -> float:
+    """Current Unix time measured from a monotonic clock"""
+    return CLOCK_ORIGIN + (time.monotonic() - MONOTONIC_ORIGIN)
+
+
+# Identifies this server run, so clients can tell when event sequence numbers restart
+EVENT_EPOCH = uuid.uuid4().hex
+
+# Sequence number of the latest event for each activity, for delta sync
+activity_versions = {name: 0 for name in activities}
+
+# Number of events between roster checkpoints
+CHECKPOINT_INTERVAL = 64
+
+# checkpoints[k] holds every roster as it was after k * CHECKPOINT_INTERVAL events
+checkpoints = [{name: tuple(details["participants"]) for name, details in activities.items()}]
+
+
+def record_event(activity_name: str, action: str, email: str):
+    """Append a roster change to the event log, checkpointing periodically.
+
+    Must be called with roster_lock held, in the same critical section as the
+    roster change, so checkpoints always agree with the events before them.
+    """
+    timestamp = event_clock()
+
+    events.append((timestamp, activity_name, action, email))
+    event_timestamps.append(timestamp)
+
+    activity_versions[activity_name] = len(events)
+
+    if len(events) % CHECKPOINT_INTERVAL == 0:
+        checkpoints.append({name: tuple(details["participants"]) for name, details in activities.items()})
+
+    update_analytics(activity_name, action, timestamp)
+
+
+# Days each activity meets, parsed once from its schedule
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DAY_PATTERN = re.compile(r"\b(" + "|".join(DAYS_OF_WEEK) + r")s?\b")
+activity_days = {
+    name: sorted(set(DAY_PATTERN.findall(details["schedule"])), key=DAYS_OF_WEEK.index)
+    for name, details in activities.items()
+}
+
+# Running aggregates, updated on every signup and unregister
+enrollment_counts = {name: len(details["participants"]) for name, details in activities.items()}
+signup_totals = {name: 0 for name in activities}
+total_participants = sum(enrollment_counts.values())
+total_capacity = sum(details["max_participants"] for details in activities.values())
+open_seats_by_day = {day: 0 for day in DAYS_OF_WEEK}
+for name, details in activities.items():
+    for day in activity_days[name]:
+        open_seats_by_day[day] += details["max_participants"] - enrollment_counts[name]
+
+# Signups per second over the sliding window: deque of [second, count]
+SIGNUP_WINDOW_SECONDS = 60
+signup_buckets = deque()
+signups_in_window = 0
+
+
+def expire_signup_buckets(now: float):
+    """Drop per-second signup buckets that have left the sliding window.
+
+    Must be called with roster_lock held.
+    """
+    global signups_in_window
+    cutoff = int(now) - SIGNUP_WINDOW_SECONDS
+    while signup_buckets and signup_buckets[0][0] <= cutoff:
+        signups_in_window -= signup_buckets.popleft()[1]
+
+
+def update_analytics(activity_name: str, action: str, timestamp: float):
+    """Apply a single roster change to the running aggregates.
+
+    Called from record_event, so roster_lock is already held.
+    """
+    global total_participants, signups_in_window
+    delta = 1 if action == "signup" else -1
+
+    enrollment_counts[activity_name] += delta
+    total_participants += delta
+    for day in activity_days[activity_name]:
+        open_seats_by_day[day] -= delta
+
+    if action == "signup":
+        signup_totals[activity_name] += 1
+        second = int(timestamp)
+        if signup_buckets and signup_buckets[-1][0] == second:
+            signup_buckets[-1][1] += 1
+        else:
+            signup_buckets.append([second, 1])
+        signups_in_window += 1
+        expire_signup_buckets(timestamp)
+
+
+def roster_at(activity_name: str, position: int):
+    """Rebuild an activity's participant list after the first `position` events"""
+    with roster_lock:
+        position = min(max(position, 0), len(events))
+
+        # Start from the nearest checkpoint and replay at most CHECKPOINT_INTERVAL events
+        checkpoint = position // CHECKPOINT_INTERVAL
+        participants = list(checkpoints[checkpoint].get(activity_name, ()))
+        replay = events[checkpoint * CHECKPOINT_INTERVAL:position]
+
+    for _, name, action, email in replay:
+        if name != activity_name:
+            continue
+        if action == "signup" and email not in participants:
+            participants.append(email)
+        elif action == "unregister" and email in participants:
+            participants.remove(email)
+    return participants
+
 
 @app.get("/")
 def root():
@@ -91,6 +274,30 @@ def get_activities():
     return activities
 
 
+@app.get("/activities/changes")
+def get_activity_changes(since: Optional[int] = None, epoch: Optional[str] = None):
+    """Get the activities changed since a version, or all of them if the client is out of sync"""
+    with roster_lock:
+        version = len(events)
+
+        # Send a full snapshot on first load, after a restart, or for an unknown version
+        full = since is None or epoch != EVENT_EPOCH or not 0 <= since <= version
+
+        # Compare per-activity versions so the cost does not grow with history
+        changed = {
+            name: {**details, "participants": list(details["participants"])}
+            for name, details in activities.items()
+            if full or activity_versions[name] > since
+        }
+
+    return {
+        "epoch": EVENT_EPOCH,
+        "version": version,
+        "full": full,
+        "activities": changed
+    }
+
+
 @app.post("/activities/{activity_name}/signup")
 def signup_for_activity(activity_name: str, email: str = Form(...)):
     """Sign up a student for an activity"""
@@ -98,15 +305,20 @@ def signup_for_activity(activity_name: str, email: str = Form(...)):
     if activity_name not in activities:
         raise HTTPException(status_code=404, detail="Activity not found")
 
+    # Validate and canonicalize email
+    email = normalize_email(email)
+
     # Get the specific activity
     activity = activities[activity_name]
 
-    # Validate student is not already signed up
-    if email in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student already signed up for this activity")
+    with roster_lock:
+        # Validate student is not already signed up
+        if email in activity["participants"]:
+            raise HTTPException(status_code=400, detail="Student already signed up for this activity")
 
-    # Add student
-    activity["participants"].append(email)
+        # Add student
+        activity["participants"].append(email)
+        record_event(activity_name, "signup", email)
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
@@ -117,13 +329,79 @@ def unregister_participant(activity_name: str, email: str):
     if activity_name not in activities:
         raise HTTPException(status_code=404, detail="Activity not found")
 
+    # Match the stored form without applying the signup domain policy
+    email = email.strip().lower()
+
     # Get the specific activity
     activity = activities[activity_name]
 
-    # Check if participant is registered
-    if email not in activity["participants"]:
-        raise HTTPException(status_code=404, detail="Participant not found in this activity")
+    with roster_lock:
+        # Check if participant is registered
+        if email not in activity["participants"]:
+            raise HTTPException(status_code=404, detail="Participant not found in this activity")
 
-    # Remove participant
-    activity["participants"].remove(email)
+        # Remove participant
+        activity["participants"].remove(email)
+        record_event(activity_name, "unregister", email)
     return {"message": f"Removed {email} from {activity_name}"}
+
+
+@app.get("/analytics")
+def get_analytics(top: int = 5):
+    """Get live enrollment statistics from the running aggregates"""
+    # Read a consistent copy of the aggregates while no change is in flight
+    with roster_lock:
+        expire_signup_buckets(event_clock())
+        participants = total_participants
+        counts = dict(enrollment_counts)
+        open_seats = dict(open_seats_by_day)
+        top_demand = [
+            {"activity": name, "signups": signup_totals[name]}
+            for name in heapq.nlargest(max(top, 0), signup_totals, key=signup_totals.get)
+        ]
+        signups_per_minute = signups_in_window
+
+    return {
+        "total_participants": participants,
+        "total_capacity": total_capacity,
+        "fill_rate": participants / total_capacity if total_capacity else 0.0,
+        "activities": {
+            name: {
+                "participants": count,
+                "max_participants": activities[name]["max_participants"],
+                "fill_rate": count / activities[name]["max_participants"]
+            }
+            for name, count in counts.items()
+        },
+        "open_seats_by_day": open_seats,
+        "top_demand": top_demand,
+        "signups_per_minute": signups_per_minute
+    }
+
+
+@app.get("/activities/{activity_name}/roster")
+def get_roster(activity_name: str, version: Optional[int] = None, at: Optional[datetime] = None):
+    """Get an activity's participants after an event version or at a point in time"""
+    # Validate activity exists
+    if activity_name not in activities:
+        raise HTTPException(status_code=404, detail="Activity not found")
+
+    if version is not None:
+        position = version
+    elif at is not None:
+        # Treat naive datetimes as UTC
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        with roster_lock:
+            position = bisect_right(event_timestamps, at.timestamp())
+    else:
+        # Default to every recorded event
+        position = len(events)
+
+    position = min(max(position, 0), len(events))
+    return {
+        "activity": activity_name,
+        "version": position,
+        "at": at.isoformat() if at is not None else None,
+        "participants": roster_at(activity_name, position)
+    }
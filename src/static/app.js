@@ -4,71 +4,123 @@ document.addEventListener("DOMContentLoaded", () => {
   const signupForm = document.getElementById("signup-form");
   const messageDiv = document.getElementById("message");
 
-  // Function to fetch activities from API
+  const SNAPSHOT_KEY = "activities-snapshot";
+
+  // Register the service worker that caches static assets
+  if ("serviceWorker" in navigator) {
+    navigator.serviceWorker.register("sw.js").catch((error) => {
+      console.error("Service worker registration failed:", error);
+    });
+  }
+
+  // Function to load the last activities snapshot saved in the browser
+  function loadSnapshot() {
+    try {
+      return JSON.parse(localStorage.getItem(SNAPSHOT_KEY));
+    } catch (error) {
+      return null;
+    }
+  }
+
+  // Function to save the activities snapshot for the next visit
+  function saveSnapshot(snapshot) {
+    try {
+      localStorage.setItem(SNAPSHOT_KEY, JSON.stringify(snapshot));
+    } catch (error) {
+      console.error("Error saving activities snapshot:", error);
+    }
+  }
+
+  let snapshot = loadSnapshot();
+
+  // Function to render activities
+  function renderActivities(activities) {
+    // Clear loading message
+    activitiesList.innerHTML = "";
+
+    // Clear previous activity options (keep the default option)
+    activitySelect.innerHTML = '<option value="">-- Select an activity --</option>';
+
+    // Populate activities list
+    Object.entries(activities).forEach(([name, details]) => {
+      const activityCard = document.createElement("div");
+      activityCard.className = "activity-card";
+
+      const spotsLeft = details.max_participants - details.participants.length;
+
+      const participantsList =
+        details.participants.length > 0
+          ? `<ul class="participants-list">
+               ${details.participants
+                 .map((participant) => `
+                   <li>
+                     <span class="participant-email">${participant}</span>
+                     <button class="delete-participant-btn" 
+                             data-activity="${name}" 
+                             data-email="${participant}">
+                       ×
+                     </button>
+                   </li>
+                 `)
+                 .join("")}
+             </ul>`
+          : '<p class="no-participants">No participants yet</p>';
+
+      activityCard.innerHTML = `
+        <h4>${name}</h4>
+        <p><strong>Description:</strong> ${details.description}</p>
+        <p><strong>Schedule:</strong> ${details.schedule}</p>
+        <p><strong>Capacity:</strong> ${details.participants.length}/${details.max_participants}</p>
+        <div class="participants-section">
+            <p><strong>Participants:</strong></p>
+            ${participantsList}
+        </div>
+      `;
+
+      activitiesList.appendChild(activityCard);
+
+      // Add option to select dropdown
+      const option = document.createElement("option");
+      option.value = name;
+      option.textContent = name;
+      activitySelect.appendChild(option);
+    });
+
+    // Add event listeners for delete buttons
+    document.querySelectorAll('.delete-participant-btn').forEach(button => {
+      button.addEventListener('click', handleDeleteParticipant);
+    });
+  }
+
+  // Function to fetch activities from API, asking only for changes since the snapshot
   async function fetchActivities() {
     try {
-      const response = await fetch("/activities");
-      const activities = await response.json();
-
-      // Clear loading message
-      activitiesList.innerHTML = "";
-
-      // Clear previous activity options (keep the default option)
-      activitySelect.innerHTML = '<option value="">-- Select an activity --</option>';
-
-      // Populate activities list
-      Object.entries(activities).forEach(([name, details]) => {
-        const activityCard = document.createElement("div");
-        activityCard.className = "activity-card";
-
-        const spotsLeft = details.max_participants - details.participants.length;
-
-        const participantsList =
-          details.participants.length > 0
-            ? `<ul class="participants-list">
-                 ${details.participants
-                   .map((participant) => `
-                     <li>
-                       <span class="participant-email">${participant}</span>
-                       <button class="delete-participant-btn" 
-                               data-activity="${name}" 
-                               data-email="${participant}">
-                         ×
-                       </button>
-                     </li>
-                   `)
-                   .join("")}
-               </ul>`
-            : '<p class="no-participants">No participants yet</p>';
-
-        activityCard.innerHTML = `
-          <h4>${name}</h4>
-          <p><strong>Description:</strong> ${details.description}</p>
-          <p><strong>Schedule:</strong> ${details.schedule}</p>
-          <p><strong>Capacity:</strong> ${details.participants.length}/${details.max_participants}</p>
-          <div class="participants-section">
-              <p><strong>Participants:</strong></p>
-              ${participantsList}
-          </div>
-        `;
-
-        activitiesList.appendChild(activityCard);
-
-        // Add option to select dropdown
-        const option = document.createElement("option");
-        option.value = name;
-        option.textContent = name;
-        activitySelect.appendChild(option);
-      });
-
-      // Add event listeners for delete buttons
-      document.querySelectorAll('.delete-participant-btn').forEach(button => {
-        button.addEventListener('click', handleDeleteParticipant);
-      });
+      const params = snapshot
+        ? `?since=${snapshot.version}&epoch=${encodeURIComponent(snapshot.epoch)}`
+        : "";
+      const response = await fetch(`/activities/changes${params}`);
+      const delta = await response.json();
+
+      // Nothing changed since the snapshot that is already on screen
+      if (!delta.full && Object.keys(delta.activities).length === 0) {
+        return;
+      }
+
+      const activities = delta.full
+        ? delta.activities
+        : { ...snapshot.activities, ...delta.activities };
+
+      snapshot = { epoch: delta.epoch, version: delta.version, activities };
+      saveSnapshot(snapshot);
+      renderActivities(activities);
     } catch (error) {
-      activitiesList.innerHTML =
-        "<p>Failed to load activities. Please try again later.</p>";
       console.error("Error fetching activities:", error);
+
+      // Keep showing the cached snapshot when offline
+      if (!snapshot) {
+        activitiesList.innerHTML =
+          "<p>Failed to load activities. Please try again later.</p>";
+      }
     }
   }
 
@@ -165,6 +217,9 @@ document.addEventListener("DOMContentLoaded", () => {
     }, 5000);
   }
 
-  // Initialize app
+  // Initialize app, rendering the cached snapshot right away
+  if (snapshot) {
+    renderActivities(snapshot.activities);
+  }
   fetchActivities();
 });
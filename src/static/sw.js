@@ -0,0 +1,66 @@
+const CACHE_NAME = "mergington-static-v1";
+const STATIC_ASSETS = [
+  "/static/index.html",
+  "/static/app.js",
+  "/static/styles.css",
+];
+
+// Cache static assets when the service worker is installed
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches.open(CACHE_NAME).then((cache) => cache.addAll(STATIC_ASSETS))
+  );
+  self.skipWaiting();
+});
+
+// Remove caches left over from previous versions
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches.keys().then((names) =>
+      Promise.all(
+        names
+          .filter((name) => name !== CACHE_NAME)
+          .map((name) => caches.delete(name))
+      )
+    )
+  );
+  self.clients.claim();
+});
+
+// Serve static assets from the cache and refresh them in the background
+self.addEventListener("fetch", (event) => {
+  const url = new URL(event.request.url);
+
+  if (
+    event.request.method !== "GET" ||
+    url.origin !== self.location.origin ||
+    !STATIC_ASSETS.includes(url.pathname)
+  ) {
+    return;
+  }
+
+  event.respondWith(
+    caches.open(CACHE_NAME).then(async (cache) => {
+      const cached = await cache.match(event.request);
+      const refresh = fetch(event.request)
+        .then((response) => {
+          if (response.ok) {
+            cache.put(event.request, response.clone());
+          }
+          return response;
+        })
+        .catch((error) => {
+          if (cached) {
+            return cached;
+          }
+          throw error;
+        });
+
+      if (cached) {
+        event.waitUntil(refresh);
+        return cached;
+      }
+      return refresh;
+    })
+  );
+});
@@ -6,13 +6,43 @@ import os
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from app import app
+import app as app_module
+from app import app, activities, events, event_timestamps, checkpoints
 
 @pytest.fixture
 def client():
     """Create a test client for the FastAPI application."""
     return TestClient(app)
 
+@pytest.fixture
+def restore_history():
+    """Restore the rosters, event log and analytics after a test that rewrites history."""
+    rosters = {name: list(details["participants"]) for name, details in activities.items()}
+    saved_events = list(events)
+    saved_timestamps = list(event_timestamps)
+    saved_checkpoints = list(checkpoints)
+    saved_versions = dict(app_module.activity_versions)
+    saved_counts = dict(app_module.enrollment_counts)
+    saved_totals = dict(app_module.signup_totals)
+    saved_open_seats = dict(app_module.open_seats_by_day)
+    saved_buckets = [list(bucket) for bucket in app_module.signup_buckets]
+    saved_participants = app_module.total_participants
+    saved_in_window = app_module.signups_in_window
+    yield
+    app_module.activity_versions.update(saved_versions)
+    app_module.enrollment_counts.update(saved_counts)
+    app_module.signup_totals.update(saved_totals)
+    app_module.open_seats_by_day.update(saved_open_seats)
+    app_module.signup_buckets.clear()
+    app_module.signup_buckets.extend(saved_buckets)
+    app_module.total_participants = saved_participants
+    app_module.signups_in_window = saved_in_window
+    for name, participants in rosters.items():
+        activities[name]["participants"][:] = participants
+    events[:] = saved_events
+    event_timestamps[:] = saved_timestamps
+    checkpoints[:] = saved_checkpoints
+
 @pytest.fixture
 def sample_activities():
     """Sample activities data for testing."""
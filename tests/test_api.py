@@ -1,13 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch
+from collections import deque
+from datetime import datetime, timedelta, timezone
 import sys
 import os
+import threading
+import time
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from app import app, activities
+import app as app_module
+from app import app, activities, CHECKPOINT_INTERVAL, SIGNUP_WINDOW_SECONDS, expire_signup_buckets
 
 
 class TestRootEndpoint:
@@ -62,6 +67,75 @@ class TestActivitiesEndpoint:
         assert isinstance(chess_club["participants"], list)
 
 
+class TestActivityChangesEndpoint:
+    """Test cases for the activity delta sync endpoint."""
+    
+    def test_changes_without_version_returns_full_snapshot(self, client):
+        """Test that a first request gets every activity."""
+        response = client.get("/activities/changes")
+        assert response.status_code == 200
+        
+        result = response.json()
+        assert result["full"] is True
+        assert result["activities"] == client.get("/activities").json()
+        assert isinstance(result["version"], int)
+    
+    def test_changes_since_version_returns_only_changed_activities(self, client):
+        """Test that only activities changed after the version are returned."""
+        snapshot = client.get("/activities/changes").json()
+        
+        client.post("/activities/Drama Club/signup", data={"email": "delta.test@mergington.edu"})
+        
+        response = client.get(
+            "/activities/changes",
+            params={"since": snapshot["version"], "epoch": snapshot["epoch"]}
+        )
+        result = response.json()
+        
+        assert result["full"] is False
+        assert result["version"] == snapshot["version"] + 1
+        assert list(result["activities"]) == ["Drama Club"]
+        assert "delta.test@mergington.edu" in result["activities"]["Drama Club"]["participants"]
+        
+        # Nothing has changed since the latest version
+        response = client.get(
+            "/activities/changes",
+            params={"since": result["version"], "epoch": result["epoch"]}
+        )
+        assert response.json()["activities"] == {}
+    
+    def test_changes_use_per_activity_versions(self, client):
+        """Test that each activity records the version of its latest change."""
+        client.post("/activities/Chess Club/signup", data={"email": "far.behind@mergington.edu"})
+        snapshot = client.get("/activities/changes").json()
+        
+        assert app_module.activity_versions["Chess Club"] == snapshot["version"]
+        
+        # A client that is far behind only gets activities changed since its version
+        response = client.get(
+            "/activities/changes",
+            params={"since": 0, "epoch": snapshot["epoch"]}
+        )
+        changed = {name for name, version in app_module.activity_versions.items() if version > 0}
+        assert set(response.json()["activities"]) == changed
+    
+    def test_changes_with_unknown_epoch_or_version_returns_full_snapshot(self, client):
+        """Test that clients from another server run or future version resync."""
+        snapshot = client.get("/activities/changes").json()
+        
+        response = client.get(
+            "/activities/changes",
+            params={"since": snapshot["version"], "epoch": "stale"}
+        )
+        assert response.json()["full"] is True
+        
+        response = client.get(
+            "/activities/changes",
+            params={"since": snapshot["version"] + 1000, "epoch": snapshot["epoch"]}
+        )
+        assert response.json()["full"] is True
+
+
 class TestSignupEndpoint:
     """Test cases for the activity signup endpoint."""
     
@@ -204,6 +278,178 @@ class TestDeleteParticipantEndpoint:
         assert test_email in result["message"]
 
 
+class TestRosterHistoryEndpoint:
+    """Test cases for the point-in-time roster endpoint."""
+    
+    def test_roster_defaults_to_current_participants(self, client):
+        """Test that the roster without a version or time matches the live list."""
+        response = client.get("/activities/Chess Club/roster")
+        assert response.status_code == 200
+        
+        current = client.get("/activities").json()["Chess Club"]["participants"]
+        assert response.json()["participants"] == current
+    
+    def test_roster_activity_not_found(self, client):
+        """Test roster lookup for a non-existent activity."""
+        response = client.get("/activities/Nonexistent Activity/roster")
+        
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Activity not found"
+    
+    def test_roster_by_version(self, client):
+        """Test reconstructing a roster after each event version."""
+        activity_name = "Soccer Team"
+        test_email = "version.test@mergington.edu"
+        start = client.get(f"/activities/{activity_name}/roster").json()["version"]
+        
+        client.post(f"/activities/{activity_name}/signup", data={"email": test_email})
+        client.delete(f"/activities/{activity_name}/participants/{test_email}")
+        
+        def roster(version):
+            response = client.get(f"/activities/{activity_name}/roster", params={"version": version})
+            assert response.status_code == 200
+            assert response.json()["version"] == version
+            return response.json()["participants"]
+        
+        assert test_email not in roster(start)
+        assert test_email in roster(start + 1)
+        assert test_email not in roster(start + 2)
+    
+    def test_roster_before_and_after_changes(self, client, restore_history):
+        """Test reconstructing a roster on either side of a signup and removal."""
+        activity_name = "Soccer Team"
+        test_email = "history.test@mergington.edu"
+        before = datetime.now(timezone.utc) + timedelta(days=1)
+        
+        # Use a fake clock so each event lands at a distinct, known time
+        clock = [before.timestamp() + second for second in range(1, 3)]
+        with patch("app.event_clock", side_effect=clock):
+            client.post(f"/activities/{activity_name}/signup", data={"email": test_email})
+            client.delete(f"/activities/{activity_name}/participants/{test_email}")
+        
+        def roster(seconds):
+            at = (before + timedelta(seconds=seconds)).isoformat()
+            response = client.get(f"/activities/{activity_name}/roster", params={"at": at})
+            assert response.status_code == 200
+            return response.json()["participants"]
+        
+        assert test_email not in roster(0)
+        assert test_email in roster(1.5)
+        assert test_email not in roster(2.5)
+    
+    def test_roster_replays_across_checkpoints(self, client):
+        """Test reconstruction when the history spans several checkpoints."""
+        activity_name = "Gym Class"
+        start = client.get(f"/activities/{activity_name}/roster").json()["version"]
+        
+        # Enough changes to create more than one checkpoint
+        emails = [f"checkpoint{i}@mergington.edu" for i in range(CHECKPOINT_INTERVAL)]
+        for email in emails:
+            client.post(f"/activities/{activity_name}/signup", data={"email": email})
+            client.delete(f"/activities/{activity_name}/participants/{email}")
+        
+        # Each email is only on the roster between its signup and removal
+        for index in [0, CHECKPOINT_INTERVAL // 2, CHECKPOINT_INTERVAL - 1]:
+            version = start + 2 * index + 1
+            response = client.get(f"/activities/{activity_name}/roster", params={"version": version})
+            participants = response.json()["participants"]
+            
+            assert emails[index] in participants
+            assert not (set(emails) - {emails[index]}) & set(participants)
+    
+    def test_concurrent_changes_keep_checkpoints_consistent(self, client):
+        """Test that concurrent signups and removals replay to the live rosters."""
+        activity_name = "Gym Class"
+        start = client.get(f"/activities/{activity_name}/roster").json()["version"]
+        
+        def churn(worker):
+            for i in range(CHECKPOINT_INTERVAL // 2):
+                email = f"thread{worker}.{i}@mergington.edu"
+                client.post(f"/activities/{activity_name}/signup", data={"email": email})
+                client.delete(f"/activities/{activity_name}/participants/{email}")
+        
+        threads = [threading.Thread(target=churn, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # Every intermediate roster can be rebuilt, and the last one matches the live list
+        end = client.get(f"/activities/{activity_name}/roster").json()["version"]
+        for version in range(start, end + 1):
+            response = client.get(f"/activities/{activity_name}/roster", params={"version": version})
+            assert response.status_code == 200
+        
+        current = client.get("/activities").json()[activity_name]["participants"]
+        assert response.json()["participants"] == current
+
+
+class TestAnalyticsEndpoint:
+    """Test cases for the enrollment analytics endpoint."""
+    
+    def test_analytics_matches_rosters(self, client):
+        """Test that running aggregates agree with the activity rosters."""
+        data = client.get("/activities").json()
+        response = client.get("/analytics")
+        assert response.status_code == 200
+        analytics = response.json()
+        
+        assert analytics["total_participants"] == sum(len(d["participants"]) for d in data.values())
+        assert analytics["total_capacity"] == sum(d["max_participants"] for d in data.values())
+        for name, details in data.items():
+            assert analytics["activities"][name]["participants"] == len(details["participants"])
+            assert analytics["activities"][name]["max_participants"] == details["max_participants"]
+        
+        # Activities that meet on Wednesdays
+        wednesday = ["Gym Class", "Soccer Team", "Science Club"]
+        expected_open = sum(data[n]["max_participants"] - len(data[n]["participants"]) for n in wednesday)
+        assert analytics["open_seats_by_day"]["Wednesday"] == expected_open
+    
+    def test_analytics_updates_on_signup_and_unregister(self, client):
+        """Test that signup and removal update the aggregates."""
+        activity_name = "Programming Class"
+        test_email = "analytics.test@mergington.edu"
+        before = client.get("/analytics").json()
+        
+        client.post(f"/activities/{activity_name}/signup", data={"email": test_email})
+        after_signup = client.get("/analytics").json()
+        
+        assert after_signup["total_participants"] == before["total_participants"] + 1
+        assert after_signup["activities"][activity_name]["participants"] == \
+               before["activities"][activity_name]["participants"] + 1
+        assert after_signup["open_seats_by_day"]["Tuesday"] == before["open_seats_by_day"]["Tuesday"] - 1
+        assert after_signup["open_seats_by_day"]["Thursday"] == before["open_seats_by_day"]["Thursday"] - 1
+        assert after_signup["open_seats_by_day"]["Monday"] == before["open_seats_by_day"]["Monday"]
+        assert after_signup["signups_per_minute"] == before["signups_per_minute"] + 1
+        
+        client.delete(f"/activities/{activity_name}/participants/{test_email}")
+        after_unregister = client.get("/analytics").json()
+        
+        assert after_unregister["total_participants"] == before["total_participants"]
+        assert after_unregister["open_seats_by_day"] == before["open_seats_by_day"]
+    
+    def test_analytics_top_demand(self, client):
+        """Test that top demand is ordered by total signups."""
+        response = client.get("/analytics", params={"top": 3})
+        top_demand = response.json()["top_demand"]
+        
+        assert len(top_demand) == 3
+        signups = [entry["signups"] for entry in top_demand]
+        assert signups == sorted(signups, reverse=True)
+    
+    def test_signup_window_expires(self):
+        """Test that signups older than the window are no longer counted."""
+        now = time.time()
+        buckets = deque([[int(now) - SIGNUP_WINDOW_SECONDS - 5, 3], [int(now), 2]])
+        
+        with patch.object(app_module, "signup_buckets", buckets), \
+             patch.object(app_module, "signups_in_window", 5):
+            expire_signup_buckets(now)
+            
+            assert app_module.signups_in_window == 2
+            assert list(app_module.signup_buckets) == [[int(now), 2]]
+
+
 class TestIntegrationScenarios:
     """Integration test scenarios."""
     
@@ -45,6 +45,17 @@ class TestStaticFiles:
         assert "participants-list" in content
         assert "delete-participant-btn" in content
     
+    def test_serve_service_worker(self, client):
+        """Test that the service worker script is served correctly."""
+        response = client.get("/static/sw.js")
+        assert response.status_code == 200
+        assert "application/javascript" in response.headers["content-type"] or \
+               "text/javascript" in response.headers["content-type"]
+        
+        content = response.text
+        assert "STATIC_ASSETS" in content
+        assert "caches.open" in content
+    
     def test_nonexistent_static_file(self, client):
         """Test requesting a non-existent static file."""
         response = client.get("/static/nonexistent.txt")
@@ -1,12 +1,13 @@
 import pytest
 from fastapi.testclient import TestClient
+from unittest.mock import patch
 import sys
 import os
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from app import app, activities
+from app import app, activities, canonicalize_email
 
 
 class TestDataValidation:
@@ -60,6 +61,103 @@ class TestDataValidation:
             assert response.status_code in [200, 400, 422]
 
 
+class TestEmailNormalization:
+    """Test email validation and canonicalization."""
+    
+    def test_canonicalize_email(self):
+        """Test that emails are trimmed and lowercased."""
+        assert canonicalize_email("  Student@Mergington.EDU\n") == "student@mergington.edu"
+        assert canonicalize_email("student+tag@mergington.edu") == "student+tag@mergington.edu"
+    
+    def test_canonicalize_rejects_invalid_emails(self):
+        """Test that malformed and foreign-domain emails are rejected."""
+        invalid_emails = [
+            "",
+            "   ",
+            "no-at-sign",
+            "two@@mergington.edu",
+            ".leading@mergington.edu",
+            "student@gmail.com",
+            "a" * 65 + "@mergington.edu",
+        ]
+        
+        for email in invalid_emails:
+            assert canonicalize_email(email) is None
+    
+    def test_signup_rejects_invalid_email(self, client):
+        """Test that signup rejects emails outside the allowed domains."""
+        response = client.post(
+            "/activities/Chess Club/signup",
+            data={"email": "outsider@example.com"}
+        )
+        
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid email address"
+    
+    def test_signup_detects_case_and_whitespace_duplicates(self, client):
+        """Test that case and whitespace variants count as the same student."""
+        response = client.post(
+            "/activities/Drama Club/signup",
+            data={"email": "Variant.Test@mergington.edu"}
+        )
+        assert response.status_code == 200
+        assert "variant.test@mergington.edu" in response.json()["message"]
+        
+        response = client.post(
+            "/activities/Drama Club/signup",
+            data={"email": "  VARIANT.TEST@Mergington.Edu  "}
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Student already signed up for this activity"
+        
+        participants = client.get("/activities").json()["Drama Club"]["participants"]
+        assert participants.count("variant.test@mergington.edu") == 1
+    
+    def test_signup_unknown_activity_checked_before_email(self, client):
+        """Test that an unknown activity is reported before an invalid email."""
+        response = client.post(
+            "/activities/Nonexistent Activity/signup",
+            data={"email": "not-an-email"}
+        )
+        
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Activity not found"
+    
+    def test_unregister_unknown_activity_checked_before_email(self, client):
+        """Test that removal from an unknown activity returns 404 for any email."""
+        response = client.delete("/activities/Nonexistent Activity/participants/not-an-email")
+        
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Activity not found"
+    
+    def test_unregister_ignores_domain_policy(self, client):
+        """Test that participants can be removed after the allowed domains narrow."""
+        client.post(
+            "/activities/Chess Club/signup",
+            data={"email": "narrowed.domain@mergington.edu"}
+        )
+        
+        canonicalize_email.cache_clear()
+        try:
+            with patch("app.ALLOWED_EMAIL_DOMAINS", frozenset({"example.edu"})):
+                response = client.delete("/activities/Chess Club/participants/ Narrowed.Domain@Mergington.edu ")
+        finally:
+            canonicalize_email.cache_clear()
+        
+        assert response.status_code == 200
+        assert "narrowed.domain@mergington.edu" not in activities["Chess Club"]["participants"]
+    
+    def test_unregister_with_case_variant(self, client):
+        """Test that unregistering matches the canonical email."""
+        client.post(
+            "/activities/Math Olympiad/signup",
+            data={"email": "unregister.variant@mergington.edu"}
+        )
+        
+        response = client.delete("/activities/Math Olympiad/participants/Unregister.Variant@Mergington.edu")
+        assert response.status_code == 200
+
+
 class TestDataConsistency:
     """Test data consistency and state management."""
     